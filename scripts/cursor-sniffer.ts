@@ -20,6 +20,7 @@
  *   --analyze-sse <path>    Analyze SSE-format file
  *   --analyze               Analyze hex from stdin
  *   --analyze-base64        Analyze base64 from stdin
+ *   --server                Persistent analysis worker (length-prefixed stdio)
  *
  * Options:
  *   --port <port>      Proxy port (default: 8888)
@@ -49,6 +50,7 @@ import {
   parseAgentClientMessage,
   parseAgentServerMessage,
   removeEnvelope,
+  runAnalyzeServer,
   hexDump as hexDumpModule,
   type DataFormat,
 } from "./sniffer/analyzer";
@@ -120,6 +122,7 @@ ${c.cyan}Analysis:${c.reset}
   ${c.yellow}--analyze-sse <path>${c.reset}   Analyze SSE-format file
   ${c.yellow}--analyze${c.reset}              Analyze hex from stdin
   ${c.yellow}--analyze-base64${c.reset}       Analyze base64 from stdin
+  ${c.yellow}--server${c.reset}               Persistent analysis worker (length-prefixed stdio)
 
 ${c.cyan}Options:${c.reset}
   --port <port>      Proxy port (default: 8888)
@@ -965,6 +968,12 @@ async function main(): Promise<void> {
     return;
   }
 
+  // Persistent analysis worker (used by scripts/mitmproxy-addon.py)
+  if (args.includes("--server")) {
+    await runAnalyzeServer();
+    return;
+  }
+
   // Check for stdin analysis mode
   if (args.includes("--analyze") || args.includes("--analyze-stdin")) {
     await analyzeFromStdin({
@@ -973,6 +982,7 @@ async function main(): Promise<void> {
       verbose,
       showRaw,
       endpoint: endpoint || undefined,
+      format: formatOverride || undefined,
     });
     return;
   }
@@ -984,6 +994,7 @@ async function main(): Promise<void> {
       verbose,
       showRaw,
       endpoint: endpoint || undefined,
+      format: formatOverride || undefined,
     });
     return;
   }
@@ -46,19 +46,31 @@ For Cursor IDE (respects HTTP_PROXY):
 
 Requirements:
     pip install mitmproxy
+    pip install orjson  # optional, speeds up cursor_dump_toolcalls
 """
 
+import concurrent.futures
 import subprocess
-import base64
+import io
 import json
 import os
 import re
+import select
+import struct
 import sys
+import threading
+import time
+from binascii import a2b_base64
 from datetime import datetime
-from typing import Optional, List, Set
+from typing import Dict, Optional, Set, Tuple
 from mitmproxy import ctx, http
 from mitmproxy.addonmanager import Loader
 
+try:
+    import orjson
+except ImportError:  # Optional: faster tool call dump serialization
+    orjson = None
+
 
 # Endpoint patterns to filter
 NOISE_ENDPOINTS = {
@@ -93,6 +105,24 @@ AI_ENDPOINTS = {
     "Conversation",
 }
 
+# Each set compiled into one alternation so classification is a single scan
+_NOISE_RE = re.compile("|".join(re.escape(s) for s in sorted(NOISE_ENDPOINTS)))
+_AI_RE = re.compile("|".join(re.escape(s) for s in sorted(AI_ENDPOINTS)))
+
+# Responses that are streamed (parsed chunk by chunk instead of buffered)
+_STREAMING_CONTENT_TYPE_RE = re.compile(r"grpc|connect|event-stream")
+_STREAMING_ENDPOINT_RE = re.compile(r"AgentService/Run|RunSSE|BidiAppend|Stream")
+# Streamed responses whose body is gRPC-Web / Connect framed; only these
+# have partial frames carried across chunks
+_FRAMED_CONTENT_TYPE_RE = re.compile(r"grpc|connect")
+
+# Largest pending frame held back for reassembly; a bigger declared length
+# means the stream is not framed the way we think (or is too big to buffer)
+MAX_REASSEMBLED_FRAME = 4 * 1024 * 1024
+
+# Max endpoint paths remembered by CursorAnalyzer's classification cache
+CLASSIFY_CACHE_SIZE = 2048
+
 
 # ANSI colors for terminal output
 class Colors:
@@ -105,16 +135,75 @@ class Colors:
     BLUE = "\033[34m"
     MAGENTA = "\033[35m"
     CYAN = "\033[36m"
+    
+    def disable(self):
+        """Blank all color codes on this instance."""
+        for name in vars(Colors):
+            if name.isupper():
+                setattr(self, name, "")
 
 
 c = Colors()
+if not sys.stdout.isatty():
+    c.disable()  # Plain output when piped or redirected
+
+# Log line prefixes used for every message, formatted once
+_SIZE_PREFIX = f"  {c.CYAN}Size:{c.RESET} "
+_STATUS_PREFIX = f"  {c.CYAN}Status:{c.RESET} "
+_FRAMES_PREFIX = f"  {c.CYAN}Frames:{c.RESET} "
+_CHUNKS_PREFIX = f"  {c.CYAN}Chunks:{c.RESET} "
+_TOTAL_SIZE_PREFIX = f"  {c.CYAN}Total Size:{c.RESET} "
+_AI_RESPONSE_HEADER = f"  {c.GREEN}AI Response:{c.RESET}"
+_STREAM_FINISHED = f"  {c.GREEN}[Stream Finished]{c.RESET}"
+
+# gRPC-Web frame header: 1 flag byte + 4-byte big-endian payload length
+_GRPC_HEADER = struct.Struct(">BI")
+
+# Length prefix of cursor-sniffer.ts --server frames (both directions)
+_ANALYZER_LEN = struct.Struct(">I")
+_ANALYZER_DIRECTIONS = {"request": 1, "response": 2}
+
+# `data: ` lines of an SSE body, matched on the raw bytes
+_SSE_DATA_RE = re.compile(rb"^data: ([^\n]*)", re.MULTILINE)
+
+# ANSI escape sequences, stripped from lines written to the output file
+_ANSI_RE = re.compile(r'\033\[[0-9;]*m')
+
+
+def dump_json_line(obj) -> bytes:
+    """Serialize obj as one UTF-8 JSON Lines record (newline included)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except orjson.JSONEncodeError:
+            pass  # e.g. ints beyond 64 bits from malformed varints
+    return json.dumps(obj, ensure_ascii=False).encode() + b"\n"
 
 
 def parse_varint(data: bytes, offset: int) -> tuple:
-    """Parse a protobuf varint, return (value, new_offset)."""
+    """Parse a protobuf varint, return (value, new_offset).
+
+    Most tags and lengths fit in a single byte, so that case is handled
+    inline and only multi-byte values fall through to the loop.
+    """
+    byte = data[offset]
+    if byte < 0x80:
+        return byte, offset + 1
+    return _parse_varint_slow(data, offset)
+
+
+def _parse_varint_slow(data: bytes, offset: int) -> tuple:
+    """Parse a multi-byte protobuf varint, return (value, new_offset)."""
+    # Two-byte values (lengths 128..16383) are common enough to unroll
+    if offset + 1 < len(data):
+        second = data[offset + 1]
+        if second < 0x80:
+            return (data[offset] & 0x7F) | (second << 7), offset + 2
+    # A varint is at most 10 bytes; stop there instead of scanning corrupt data
+    end = min(len(data), offset + 10)
     result = 0
     shift = 0
-    while offset < len(data):
+    while offset < end:
         byte = data[offset]
         result |= (byte & 0x7F) << shift
         offset += 1
@@ -129,65 +218,190 @@ def parse_proto_fields(data: bytes) -> list:
     
     Returns list of (field_number, wire_type, value) tuples.
     wire_type 0 = varint, 2 = length-delimited (bytes/string)
+    
+    Length-delimited values are zero-copy memoryview slices of the input;
+    decode them with str(value, 'utf-8') or copy with bytes(value).
     """
+    if not isinstance(data, memoryview):
+        data = memoryview(data)
     fields = []
     offset = 0
-    
-    while offset < len(data):
-        try:
-            tag, offset = parse_varint(data, offset)
-            field_number = tag >> 3
-            wire_type = tag & 0x07
-            
-            if wire_type == 0:  # Varint
-                value, offset = parse_varint(data, offset)
-                fields.append((field_number, wire_type, value))
-            elif wire_type == 2:  # Length-delimited
-                length, offset = parse_varint(data, offset)
-                if offset + length > len(data):
-                    break
-                value = data[offset:offset + length]
-                offset += length
-                fields.append((field_number, wire_type, value))
-            elif wire_type == 1:  # 64-bit
-                offset += 8
-            elif wire_type == 5:  # 32-bit
-                offset += 4
+    end = len(data)
+
+    while offset < end:
+        # Single-byte tags/lengths are decoded inline to skip the call
+        tag = data[offset]
+        if tag < 0x80:
+            offset += 1
+        else:
+            tag, offset = _parse_varint_slow(data, offset)
+        if offset >= end:
+            break  # Tag without a value (truncated)
+        field_number = tag >> 3
+        wire_type = tag & 0x07
+
+        if wire_type == 0:  # Varint
+            value, offset = parse_varint(data, offset)
+            fields.append((field_number, wire_type, value))
+        elif wire_type == 2:  # Length-delimited
+            length = data[offset]
+            if length < 0x80:
+                offset += 1
             else:
-                break  # Unknown wire type
-        except Exception:
-            break
+                length, offset = _parse_varint_slow(data, offset)
+            if offset + length > end:
+                break
+            value = data[offset:offset + length]
+            offset += length
+            fields.append((field_number, wire_type, value))
+        elif wire_type == 1:  # 64-bit
+            offset += 8
+        elif wire_type == 5:  # 32-bit
+            offset += 4
+        else:
+            break  # Unknown wire type
     
     return fields
 
 
+def _skip_field(data, offset: int, wire_type: int) -> int:
+    """Advance past a non length-delimited field, return -1 if unskippable."""
+    if wire_type == 0:  # Varint
+        return parse_varint(data, offset)[1]
+    if wire_type == 1:  # 64-bit
+        return offset + 8
+    if wire_type == 5:  # 32-bit
+        return offset + 4
+    return -1  # Unknown wire type
+
+
+def _iter_field1(data):
+    """Yield each length-delimited field 1 of a message as a memoryview slice.
+    
+    Every other field is skipped by wire type without being materialized.
+    """
+    mv = data if isinstance(data, memoryview) else memoryview(data)
+    end = len(mv)
+    offset = 0
+    while offset < end:
+        tag, offset = parse_varint(mv, offset)
+        if offset >= end:
+            return
+        if tag & 0x07 != 2:
+            offset = _skip_field(mv, offset, tag & 0x07)
+            if offset < 0:
+                return
+            continue
+        length, offset = parse_varint(mv, offset)
+        field_end = offset + length
+        if field_end > end:
+            return
+        if tag >> 3 == 1:
+            yield mv[offset:field_end]
+        offset = field_end
+
+
 def extract_text_from_agent_message(data: bytes) -> list:
     """Extract text content from AgentServerMessage protobuf (simple version)."""
     texts = []
     
-    try:
-        outer_fields = parse_proto_fields(data)
-        for fn, wt, val in outer_fields:
-            if fn == 1 and wt == 2 and isinstance(val, bytes):
-                update_fields = parse_proto_fields(val)
-                for ufn, uwt, uval in update_fields:
-                    if ufn in (1, 4, 8) and uwt == 2 and isinstance(uval, bytes):
-                        inner_fields = parse_proto_fields(uval)
-                        for ifn, iwt, ival in inner_fields:
-                            if ifn == 1 and iwt == 2 and isinstance(ival, bytes):
-                                try:
-                                    text = ival.decode('utf-8')
-                                    if text.strip():
-                                        texts.append(text)
-                                except:
-                                    pass
-    except Exception:
-        pass
+    for update in _iter_field1(data):
+        update_fields = parse_proto_fields(update)
+        for ufn, uwt, uval in update_fields:
+            if ufn in (1, 4, 8) and uwt == 2:
+                inner_fields = parse_proto_fields(uval)
+                for ifn, iwt, ival in inner_fields:
+                    if ifn == 1 and iwt == 2:
+                        try:
+                            text = str(ival, 'utf-8')
+                            if text.strip():
+                                texts.append(text)
+                        except UnicodeDecodeError:
+                            pass
     
     return texts
 
 
-def parse_agent_message_detailed(data: bytes) -> list:
+# InteractionUpdate field names (field number -> event type)
+FIELD_NAMES = {
+    1: "text_delta",
+    2: "tool_call_started",
+    3: "tool_call_completed",
+    4: "thinking_delta",
+    7: "partial_tool_call",
+    8: "token_delta",
+    13: "heartbeat",
+    14: "turn_ended",
+}
+
+# FIELD_NAMES indexed by field number (None for unknown fields)
+_FIELD_NAMES_VEC = tuple(FIELD_NAMES.get(i) for i in range(max(FIELD_NAMES) + 1))
+
+
+def _handle_text_update(uval, field_name: str, results: list, include_raw: bool,
+                        text_buf: Optional[bytearray]):
+    """Text/thinking/token delta update: field 1 holds the text."""
+    for text_bytes in _iter_field1(uval):
+        if text_buf is not None:
+            text_buf += text_bytes
+        try:
+            text = str(text_bytes, 'utf-8')
+            if text:
+                results.append({
+                    "type": field_name,
+                    "content": text
+                })
+        except UnicodeDecodeError:
+            pass
+
+
+def _handle_tool_call_update(uval, field_name: str, results: list, include_raw: bool,
+                             text_buf: Optional[bytearray]):
+    """Tool call started/completed update - extract tool info."""
+    event = {"type": field_name, "content": parse_tool_call_info(uval)}
+    if include_raw:
+        event["raw_hex"] = uval.hex()  # Raw bytes for verification
+    results.append(event)
+
+
+def _handle_partial_tool_call_update(uval, field_name: str, results: list, include_raw: bool,
+                                     text_buf: Optional[bytearray]):
+    """Partial tool call update - incremental tool arguments."""
+    event = {"type": field_name, "content": parse_partial_tool_call(uval)}
+    if include_raw:
+        event["raw_hex"] = uval.hex()  # Raw bytes for verification
+    results.append(event)
+
+
+def _handle_empty_update(uval, field_name: str, results: list, include_raw: bool,
+                         text_buf: Optional[bytearray]):
+    """Heartbeat / turn ended update - no content."""
+    results.append({"type": field_name, "content": None})
+
+
+# InteractionUpdate field number -> handler for its length-delimited payload
+_UPDATE_HANDLERS = {
+    1: _handle_text_update,
+    2: _handle_tool_call_update,
+    3: _handle_tool_call_update,
+    4: _handle_text_update,
+    7: _handle_partial_tool_call_update,
+    8: _handle_text_update,
+    13: _handle_empty_update,
+    14: _handle_empty_update,
+}
+
+
+# Event types listed (and dumped) as tool calls in the stream summary
+_TOOL_EVENT_TYPES = frozenset(("tool_call_started", "tool_call_completed", "partial_tool_call"))
+
+# Event types whose content makes up the AI response text
+_TEXT_EVENT_TYPES = frozenset(("text_delta", "thinking_delta", "token_delta"))
+
+
+def parse_agent_message_detailed(data: bytes, include_raw: bool = False,
+                                 text_buf: Optional[bytearray] = None,
+                                 results: Optional[list] = None) -> list:
     """Parse AgentServerMessage and extract all field types with details.
     
     InteractionUpdate fields:
@@ -200,81 +414,47 @@ def parse_agent_message_detailed(data: bytes) -> list:
       field 13: heartbeat
       field 14: turn_ended (TurnEndedUpdate)
     
-    Returns list of dicts with 'type' and 'content' keys.
-    """
-    results = []
+    The outer message and the InteractionUpdate are walked in a single pass
+    over the buffer without building field lists; each update field is
+    dispatched to its handler in _UPDATE_HANDLERS.
     
-    FIELD_NAMES = {
-        1: "text_delta",
-        2: "tool_call_started",
-        3: "tool_call_completed",
-        4: "thinking_delta",
-        7: "partial_tool_call",
-        8: "token_delta",
-        13: "heartbeat",
-        14: "turn_ended",
-    }
+    Returns list of dicts with 'type' and 'content' keys. Tool call events
+    also carry 'raw_hex' (the update's raw bytes) when include_raw is set.
+    If text_buf is given, the raw UTF-8 of every text field is appended to it.
+    If results is given, events are appended to (and returned in) that list,
+    so callers parsing many frames can collect them in one place.
+    """
+    if results is None:
+        results = []
     
-    try:
-        # Parse outer message (AgentServerMessage)
-        outer_fields = parse_proto_fields(data)
-        
-        for fn, wt, val in outer_fields:
-            if fn == 1 and wt == 2 and isinstance(val, bytes):
-                # This is InteractionUpdate
-                update_fields = parse_proto_fields(val)
-                
-                for ufn, uwt, uval in update_fields:
-                    field_name = FIELD_NAMES.get(ufn, f"field_{ufn}")
-                    
-                    # Text fields (1, 4, 8) - extract text from nested message
-                    if ufn in (1, 4, 8) and uwt == 2 and isinstance(uval, bytes):
-                        inner_fields = parse_proto_fields(uval)
-                        for ifn, iwt, ival in inner_fields:
-                            if ifn == 1 and iwt == 2 and isinstance(ival, bytes):
-                                try:
-                                    text = ival.decode('utf-8')
-                                    if text:
-                                        results.append({
-                                            "type": field_name,
-                                            "content": text
-                                        })
-                                except:
-                                    pass
-                    
-                    # Tool call fields (2, 3) - extract tool info
-                    elif ufn in (2, 3) and uwt == 2 and isinstance(uval, bytes):
-                        tool_info = parse_tool_call_info(uval)
-                        results.append({
-                            "type": field_name,
-                            "content": tool_info,
-                            "raw_hex": uval.hex()  # Raw bytes for verification
-                        })
-                    
-                    # Partial tool call (7)
-                    elif ufn == 7 and uwt == 2 and isinstance(uval, bytes):
-                        partial_info = parse_partial_tool_call(uval)
-                        results.append({
-                            "type": field_name,
-                            "content": partial_info,
-                            "raw_hex": uval.hex()  # Raw bytes for verification
-                        })
-                    
-                    # Heartbeat (13) - no content
-                    elif ufn == 13:
-                        results.append({
-                            "type": "heartbeat",
-                            "content": None
-                        })
-                    
-                    # Turn ended (14)
-                    elif ufn == 14:
-                        results.append({
-                            "type": "turn_ended",
-                            "content": None
-                        })
-    except Exception:
-        pass
+    # Outer message (AgentServerMessage): only field 1 is of interest
+    for update in _iter_field1(data):
+        # InteractionUpdate
+        update_end = len(update)
+        offset = 0
+        while offset < update_end:
+            utag, offset = parse_varint(update, offset)
+            if offset >= update_end:
+                break
+            ufn = utag >> 3
+            uwt = utag & 0x07
+            if uwt != 2:
+                offset = _skip_field(update, offset, uwt)
+                if offset < 0 or offset > update_end:
+                    break
+                # Heartbeat (13) / turn ended (14) - no content
+                if uwt == 0 and (ufn == 13 or ufn == 14):
+                    results.append({"type": FIELD_NAMES[ufn], "content": None})
+                continue
+            length, offset = parse_varint(update, offset)
+            field_end = offset + length
+            if field_end > update_end:
+                break
+            handler = _UPDATE_HANDLERS.get(ufn)
+            if handler is not None:
+                handler(update[offset:field_end], _FIELD_NAMES_VEC[ufn], results,
+                        include_raw, text_buf)
+            offset = field_end
     
     return results
 
@@ -342,44 +522,50 @@ TOOL_ARG_SCHEMA = {
 }
 
 
+def _make_tool_parser(tool_name: str, arg_schema: dict):
+    """Build a parser for one tool's argument message with its schema bound."""
+    def parse_tool_args(data) -> dict:
+        args = {}
+        for afn, awt, aval in parse_proto_fields(data):
+            # Get the proper argument name from schema
+            arg_name = arg_schema.get(afn) or f"field_{afn}"
+            if awt == 2:
+                try:
+                    # Try to decode nested string (field 1 inside)
+                    for nfn, nwt, nval in parse_proto_fields(aval):
+                        if nfn == 1 and nwt == 2:
+                            args[arg_name] = str(nval, 'utf-8')
+                            break
+                    else:
+                        args[arg_name] = str(aval, 'utf-8')
+                except UnicodeDecodeError:
+                    pass
+            elif awt == 0:
+                # Handle boolean/integer values
+                if arg_name == "replaceAll":
+                    args[arg_name] = (aval == 1)
+                else:
+                    args[arg_name] = aval
+        return {"tool_name": tool_name, "args": args}
+    
+    return parse_tool_args
+
+
+# ToolCall field number -> argument parser specialized for that tool
+_TOOL_PARSERS = {
+    fn: _make_tool_parser(tool_name, TOOL_ARG_SCHEMA.get(tool_name, {}))
+    for fn, tool_name in TOOL_FIELD_MAP.items()
+}
+
+
 def parse_tool_call(data: bytes) -> dict:
     """Parse a ToolCall message. Tool type is determined by field number."""
-    info = {"tool_name": "unknown", "args": {}}
-    try:
-        fields = parse_proto_fields(data)
-        for fn, wt, val in fields:
-            tool_name = TOOL_FIELD_MAP.get(fn)
-            if tool_name and wt == 2 and isinstance(val, bytes):
-                info["tool_name"] = tool_name
-                # Get argument schema for this tool
-                arg_schema = TOOL_ARG_SCHEMA.get(tool_name, {})
-                # Parse tool arguments
-                arg_fields = parse_proto_fields(val)
-                for afn, awt, aval in arg_fields:
-                    # Get the proper argument name from schema
-                    arg_name = arg_schema.get(afn, f"field_{afn}")
-                    if awt == 2 and isinstance(aval, bytes):
-                        try:
-                            # Try to decode nested string (field 1 inside)
-                            nested = parse_proto_fields(aval)
-                            for nfn, nwt, nval in nested:
-                                if nfn == 1 and nwt == 2 and isinstance(nval, bytes):
-                                    info["args"][arg_name] = nval.decode('utf-8')
-                                    break
-                            else:
-                                info["args"][arg_name] = aval.decode('utf-8')
-                        except:
-                            pass
-                    elif awt == 0:
-                        # Handle boolean/integer values
-                        if arg_name == "replaceAll":
-                            info["args"][arg_name] = (aval == 1)
-                        else:
-                            info["args"][arg_name] = aval
-                break
-    except Exception:
-        pass
-    return info
+    for fn, wt, val in parse_proto_fields(data):
+        if wt == 2:
+            parser = _TOOL_PARSERS.get(fn)
+            if parser:
+                return parser(val)
+    return {"tool_name": "unknown", "args": {}}
 
 
 def parse_tool_call_info(data: bytes) -> dict:
@@ -391,26 +577,23 @@ def parse_tool_call_info(data: bytes) -> dict:
       field 3: model_call_id (string)
     """
     info = {}
-    try:
-        fields = parse_proto_fields(data)
-        for fn, wt, val in fields:
-            if fn == 1 and wt == 2 and isinstance(val, bytes):
-                try:
-                    info["call_id"] = val.decode('utf-8')
-                except:
-                    pass
-            elif fn == 2 and wt == 2 and isinstance(val, bytes):
-                # This is the ToolCall message
-                tool_info = parse_tool_call(val)
-                info["tool_name"] = tool_info.get("tool_name", "unknown")
-                info["args"] = tool_info.get("args", {})
-            elif fn == 3 and wt == 2 and isinstance(val, bytes):
-                try:
-                    info["model_call_id"] = val.decode('utf-8')
-                except:
-                    pass
-    except Exception:
-        pass
+    fields = parse_proto_fields(data)
+    for fn, wt, val in fields:
+        if fn == 1 and wt == 2:
+            try:
+                info["call_id"] = str(val, 'utf-8')
+            except UnicodeDecodeError:
+                pass
+        elif fn == 2 and wt == 2:
+            # This is the ToolCall message
+            tool_info = parse_tool_call(val)
+            info["tool_name"] = tool_info.get("tool_name", "unknown")
+            info["args"] = tool_info.get("args", {})
+        elif fn == 3 and wt == 2:
+            try:
+                info["model_call_id"] = str(val, 'utf-8')
+            except UnicodeDecodeError:
+                pass
     return info
 
 
@@ -424,37 +607,106 @@ def parse_partial_tool_call(data: bytes) -> dict:
       field 4: model_call_id (string)
     """
     info = {}
-    try:
-        fields = parse_proto_fields(data)
-        for fn, wt, val in fields:
-            if fn == 1 and wt == 2 and isinstance(val, bytes):
-                try:
-                    info["call_id"] = val.decode('utf-8')
-                except:
-                    pass
-            elif fn == 2 and wt == 2 and isinstance(val, bytes):
-                # ToolCall message
-                tool_info = parse_tool_call(val)
-                info["tool_name"] = tool_info.get("tool_name", "unknown")
-            elif fn == 3 and wt == 2 and isinstance(val, bytes):
-                try:
-                    info["args_delta"] = val.decode('utf-8')
-                except:
-                    pass
-            elif fn == 4 and wt == 2 and isinstance(val, bytes):
-                try:
-                    info["model_call_id"] = val.decode('utf-8')
-                except:
-                    pass
-    except Exception:
-        pass
+    fields = parse_proto_fields(data)
+    for fn, wt, val in fields:
+        if fn == 1 and wt == 2:
+            try:
+                info["call_id"] = str(val, 'utf-8')
+            except UnicodeDecodeError:
+                pass
+        elif fn == 2 and wt == 2:
+            # ToolCall message
+            tool_info = parse_tool_call(val)
+            info["tool_name"] = tool_info.get("tool_name", "unknown")
+        elif fn == 3 and wt == 2:
+            try:
+                info["args_delta"] = str(val, 'utf-8')
+            except UnicodeDecodeError:
+                pass
+        elif fn == 4 and wt == 2:
+            try:
+                info["model_call_id"] = str(val, 'utf-8')
+            except UnicodeDecodeError:
+                pass
     return info
 
 
+def split_grpc_frames(data) -> tuple:
+    """Split the complete gRPC-Web frames off the front of data.
+    
+    Returns ([(flags, payload), ...], consumed) where each payload is a
+    zero-copy memoryview slice of data and consumed is the offset of the
+    first incomplete frame (len(data) if there is none).
+    """
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    unpack = _GRPC_HEADER.unpack_from
+    end = len(view)
+    frames = []
+    offset = 0
+    while offset + 5 <= end:
+        flags, length = unpack(view, offset)
+        start = offset + 5
+        if start + length > end:
+            break
+        frames.append((flags, view[start:start + length]))
+        offset = start + length
+    return frames, offset
+
+
+def strip_grpc_envelope(data):
+    """Return data without its 5-byte gRPC-Web envelope, if it has one."""
+    if len(data) >= 5 and data[0] in (0x00, 0x80):
+        length = _GRPC_HEADER.unpack_from(data)[1]
+        if 0 < length <= len(data) - 5:
+            return memoryview(data)[5:]
+    return data
+
+
+def _read_exact(fd: int, size: int, deadline: float) -> bytes:
+    """Read exactly size bytes from a pipe, raising TimeoutExpired at deadline."""
+    buf = bytearray()
+    while len(buf) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise subprocess.TimeoutExpired("cursor-sniffer.ts --server", remaining)
+        chunk = os.read(fd, size - len(buf))
+        if not chunk:
+            raise EOFError("analyzer worker exited")
+        buf += chunk
+    return bytes(buf)
+
+
 def timestamp():
     return datetime.now().strftime("%H:%M:%S.%f")[:-3]
 
 
+def _preview(s: str, n: int, suffix: str = "...") -> str:
+    """Return s truncated to n characters, marked with suffix if cut."""
+    return s if len(s) <= n else s[:n] + suffix
+
+
+def _join_preview(parts, n: int, suffix: str = "...") -> str:
+    """_preview() of ''.join(parts), consuming parts only until n is exceeded."""
+    taken = []
+    total = 0
+    for part in parts:
+        taken.append(part)
+        total += len(part)
+        if total > n:
+            return ''.join(taken)[:n] + suffix
+    return ''.join(taken)
+
+
+def _event_summary(event: dict) -> str:
+    """One-line description of a parse_agent_message_detailed() event."""
+    content = event["content"]
+    if isinstance(content, str):
+        return _preview(content, 100)
+    if isinstance(content, dict):
+        return content.get("tool_name", "unknown")
+    return ""
+
+
 class CursorAnalyzer:
     """Mitmproxy addon for analyzing Cursor API traffic."""
     
@@ -464,11 +716,34 @@ class CursorAnalyzer:
         self.verbose = False
         self.debug = False  # Log all request URLs for debugging
         self.output_file: Optional[str] = None
+        self._output_fh = None  # Append handle for output_file, kept open
         self.filter_mode = "smart"  # smart, ai, all, quiet
+        self.quiet = False  # Quiet mode with nothing else needing flow details
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         self.project_root = os.path.dirname(self.script_dir)
+        self._sniffer_script = os.path.join(self.project_root, "scripts/cursor-sniffer.ts")
+        self._bun_base_cmd = ["bun", "run", self._sniffer_script]
         self.toolcall_dump_file: Optional[str] = None
-        self.toolcall_dump_data: List[dict] = []  # Buffer for tool call data
+        self._dump_fh = None  # JSON Lines handle for toolcall_dump_file, kept open
+        self.dump_max_entries = 10000  # Rotate the dump after this many entries (0 = never)
+        self._dump_count = 0  # Entries in the current dump file
+        # path -> (show, is_ai_conversation, is_streaming_endpoint),
+        # FIFO-evicted at CLASSIFY_CACHE_SIZE
+        self._classify_cache: Dict[str, Tuple[bool, bool, bool]] = {}
+        # flow.id -> UTF-8 text of a streaming response, decoded once at
+        # completion (kept out of flow.metadata, which must stay serializable)
+        self._stream_text: Dict[str, bytearray] = {}
+        # Persistent `cursor-sniffer.ts --server` process, started on first use
+        self._bun_proc: Optional[subprocess.Popen] = None
+        self._bun_lock = threading.Lock()
+        # Serializes log output so a batched block is never interleaved
+        self._log_lock = threading.Lock()
+        self._bun_worker_failed = False  # Worker unusable, spawn per message instead
+        # Runs one-shot analyzer processes for several frames side by side
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 1),
+            thread_name_prefix="cursor-analyzer"
+        )
         
     def load(self, loader: Loader):
         """Register addon options."""
@@ -500,7 +775,13 @@ class CursorAnalyzer:
             name="cursor_dump_toolcalls",
             typespec=Optional[str],
             default=None,
-            help="Save raw tool call data to JSON file for verification"
+            help="Save raw tool call data to a JSON Lines file for verification"
+        )
+        loader.add_option(
+            name="cursor_dump_max",
+            typespec=int,
+            default=10000,
+            help="Tool call dump entries per file before it is rotated to <file>.1 (0 = unlimited)"
         )
     
     def configure(self, updates):
@@ -508,23 +789,72 @@ class CursorAnalyzer:
         if "cursor_verbose" in updates:
             self.verbose = ctx.options.cursor_verbose
         if "cursor_output" in updates:
+            self._close_output()
             self.output_file = ctx.options.cursor_output
             if self.output_file:
                 # Create/clear output file
                 with open(self.output_file, "w") as f:
                     f.write(f"# Cursor Traffic Log - {datetime.now().isoformat()}\n\n")
+                self._output_fh = open(self.output_file, "a")
         if "cursor_filter" in updates:
             self.filter_mode = ctx.options.cursor_filter
             if self.filter_mode not in ("smart", "ai", "all", "quiet"):
                 print(f"{c.YELLOW}Warning: Unknown filter mode '{self.filter_mode}', using 'smart'{c.RESET}")
                 self.filter_mode = "smart"
+            self._classify_cache.clear()
         if "cursor_debug" in updates:
             self.debug = ctx.options.cursor_debug
+        if "cursor_dump_max" in updates:
+            self.dump_max_entries = max(0, ctx.options.cursor_dump_max)
         if "cursor_dump_toolcalls" in updates:
+            self._close_dump()
             self.toolcall_dump_file = ctx.options.cursor_dump_toolcalls
             if self.toolcall_dump_file:
-                self.toolcall_dump_data = []
+                # Start a fresh dump; entries are appended one line each
+                self._dump_fh = open(self.toolcall_dump_file, "wb")
+                self._dump_count = 0
                 print(f"{c.CYAN}Tool call dump enabled: {self.toolcall_dump_file}{c.RESET}")
+        # Quiet mode only counts requests, unless debug logging or the tool
+        # call dump still need each flow inspected
+        self.quiet = self.filter_mode == "quiet" and not self.debug and not self.toolcall_dump_file
+    
+    def done(self):
+        """Called when the addon shuts down."""
+        self._close_output()
+        self._close_dump()
+        self._pool.shutdown(wait=False)
+        with self._bun_lock:
+            self._stop_bun_worker()
+    
+    def _close_output(self):
+        """Flush and close the output file handle, if open."""
+        with self._log_lock:
+            if self._output_fh is not None:
+                self._output_fh.close()
+                self._output_fh = None
+    
+    def _close_dump(self):
+        """Flush and close the tool call dump handle, if open."""
+        if self._dump_fh is not None:
+            self._dump_fh.close()
+            self._dump_fh = None
+    
+    def _rotate_dump(self):
+        """Move the full dump to <file>.1 and continue in a fresh file.
+        
+        Keeps disk use bounded over long captures while the last
+        dump_max_entries..2*dump_max_entries tool calls stay available.
+        """
+        self._dump_fh.close()
+        rotated = False
+        try:
+            os.replace(self.toolcall_dump_file, self.toolcall_dump_file + ".1")
+            rotated = True
+        finally:
+            # Keep dumping even if the rename failed; the file then grows
+            # until the next attempt, dump_max_entries later
+            self._dump_fh = open(self.toolcall_dump_file, "wb" if rotated else "ab")
+            self._dump_count = 0
     
     def running(self):
         """Called when mitmproxy is ready."""
@@ -564,10 +894,10 @@ class CursorAnalyzer:
             return False
         
         # Check if it's a noise endpoint
-        is_noise = any(noise in endpoint for noise in NOISE_ENDPOINTS)
+        is_noise = _NOISE_RE.search(endpoint) is not None
         
         # Check if it's an AI endpoint
-        is_ai = any(ai in endpoint for ai in AI_ENDPOINTS)
+        is_ai = _AI_RE.search(endpoint) is not None
         
         if self.filter_mode == "ai":
             return is_ai
@@ -578,6 +908,17 @@ class CursorAnalyzer:
         
         return True
     
+    def _classify_and_cache(self, endpoint: str) -> Tuple[bool, bool, bool]:
+        """Classify an endpoint as (show, is_ai_conversation, is_streaming_endpoint) and cache it."""
+        show = self.should_show(endpoint)
+        is_ai_conversation = "RunSSE" in endpoint or "BidiAppend" in endpoint or "BidiService" in endpoint
+        is_streaming_endpoint = _STREAMING_ENDPOINT_RE.search(endpoint) is not None
+        cache = self._classify_cache
+        if len(cache) >= CLASSIFY_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        classification = cache[endpoint] = (show, is_ai_conversation, is_streaming_endpoint)
+        return classification
+    
     def log_filtered_summary(self):
         """Log summary of filtered requests."""
         if self.filtered_count > 0:
@@ -590,13 +931,22 @@ class CursorAnalyzer:
     
     def log(self, message: str):
         """Log message to console and optionally to file."""
-        print(message)
-        if self.output_file:
-            # Strip ANSI codes for file output
-            import re
-            clean_msg = re.sub(r'\033\[[0-9;]*m', '', message)
-            with open(self.output_file, "a") as f:
-                f.write(clean_msg + "\n")
+        self._flush_log_buf(message + "\n")
+    
+    def _flush_log_buf(self, text: str):
+        """Write newline-terminated log text to console and optionally to file.
+        
+        Takes the log lock once, so multi-line blocks collected in a buffer
+        come out in one piece. The output file is flushed once per block so
+        `tail -f` sees it right away.
+        """
+        with self._log_lock:
+            sys.stdout.write(text)
+            if self._output_fh is not None:
+                # Strip ANSI codes for file output (plain text skips the regex)
+                clean_text = _ANSI_RE.sub('', text) if "\033" in text else text
+                self._output_fh.write(clean_text)
+                self._output_fh.flush()
     
     def request(self, flow: http.HTTPFlow):
         """Handle request."""
@@ -604,6 +954,13 @@ class CursorAnalyzer:
             return
         
         self.request_count += 1
+        if self.quiet:
+            # Only the periodic filtered count is shown
+            flow.metadata["cursor_show"] = False
+            self.filtered_count += 1
+            if self.filtered_count % 10 == 0:
+                self.log_filtered_summary()
+            return
         req_id = self.request_count
         
         # Store request ID for matching with response
@@ -611,7 +968,7 @@ class CursorAnalyzer:
         
         # Check if this endpoint should be shown
         endpoint = flow.request.path
-        show = self.should_show(endpoint)
+        show, is_ai_conversation, _ = self._classify_cache.get(endpoint) or self._classify_and_cache(endpoint)
         flow.metadata["cursor_show"] = show
         
         # Debug mode: log ALL request URLs
@@ -619,7 +976,6 @@ class CursorAnalyzer:
             print(f"{c.DIM}[DEBUG #{req_id}] {flow.request.method} {endpoint}{c.RESET}")
         
         # Debug: always log AI conversation endpoints
-        is_ai_conversation = "RunSSE" in endpoint or "BidiAppend" in endpoint or "BidiService" in endpoint
         if is_ai_conversation:
             self.log(f"\n{c.MAGENTA}[AI CONVERSATION DETECTED]{c.RESET}")
             show = True  # Force show AI conversation
@@ -675,23 +1031,23 @@ class CursorAnalyzer:
         endpoint = flow.request.path
         content_type = flow.response.headers.get("content-type", "")
         
+        # Quiet mode: stream straight through without parsing any frames
+        if self.quiet:
+            if _STREAMING_CONTENT_TYPE_RE.search(content_type) or _STREAMING_ENDPOINT_RE.search(endpoint):
+                flow.response.stream = True
+            return
+        
         # Enable streaming for gRPC and SSE responses
         # This prevents mitmproxy from buffering the entire response
         is_streaming = (
-            "grpc" in content_type or 
-            "connect" in content_type or
-            "event-stream" in content_type or
-            "AgentService/Run" in endpoint or
-            "RunSSE" in endpoint or
-            "BidiAppend" in endpoint or
-            "Stream" in endpoint
+            _STREAMING_CONTENT_TYPE_RE.search(content_type) is not None or
+            (self._classify_cache.get(endpoint) or self._classify_and_cache(endpoint))[2]
         )
         
         if is_streaming:
             flow.metadata["cursor_streaming"] = True
             flow.metadata["cursor_stream_bytes"] = 0
             flow.metadata["cursor_stream_chunks"] = 0
-            flow.metadata["cursor_stream_text"] = []
             flow.metadata["cursor_stream_events"] = []  # Detailed events
             flow.metadata["cursor_raw_toolcalls"] = []  # Raw tool call data for verification
             req_id = flow.metadata.get("cursor_req_id", "?")
@@ -699,43 +1055,72 @@ class CursorAnalyzer:
             # Log streaming response header immediately
             if flow.metadata.get("cursor_show", True):
                 self.log(f"\n{c.BLUE}── Streaming Response #{req_id} ──{c.RESET}")
-                self.log(f"  {c.CYAN}Status:{c.RESET} {flow.response.status_code}")
+                self.log(f"{_STATUS_PREFIX}{flow.response.status_code}")
                 self.log(f"  {c.CYAN}Content-Type:{c.RESET} {content_type}")
                 self.log(f"  {c.MAGENTA}[gRPC Stream Active]{c.RESET}")
             
             # Use a simple streaming modifier to capture data
             addon = self
+            # Raw tool call bytes are only hex-encoded when they will be dumped
+            dump_raw = bool(self.toolcall_dump_file)
+            text_buf = self._stream_text[flow.id] = bytearray()
+            # Partial frame carried to the next chunk (kept out of
+            # flow.metadata, which must stay serializable for saved flows)
+            tail = bytearray()
+            reassemble = _FRAMED_CONTENT_TYPE_RE.search(content_type) is not None
             
             def modify_stream(data: bytes) -> bytes:
                 """Stream modifier - parse protobuf and extract all event types."""
+                nonlocal tail, reassemble
                 flow.metadata["cursor_stream_bytes"] += len(data)
                 flow.metadata["cursor_stream_chunks"] += 1
                 
+                if not data:
+                    # End of body: an unfinished frame will never complete
+                    tail = bytearray()
+                    return data
+                
+                # Frames may straddle chunks: prepend the partial frame left
+                # over from the previous chunk (extended in place, no views
+                # on it exist yet)
+                if tail:
+                    tail += data
+                    buf = tail
+                else:
+                    buf = data
+                frames, offset = split_grpc_frames(buf)
+                stream_events = flow.metadata["cursor_stream_events"]
+                
                 # Parse gRPC frames and extract detailed events
                 try:
-                    offset = 0
-                    while offset + 5 <= len(data):
-                        flags = data[offset]
-                        length = int.from_bytes(data[offset+1:offset+5], 'big')
-                        if offset + 5 + length > len(data):
-                            break
-                        frame_data = data[offset+5:offset+5+length]
-                        offset += 5 + length
-                        
+                    for flags, frame_data in frames:
                         if flags & 0x80:  # Skip trailer
                             continue
                         
                         # Parse protobuf to extract detailed events
-                        events = parse_agent_message_detailed(frame_data)
-                        for event in events:
-                            flow.metadata["cursor_stream_events"].append(event)
-                            # Also collect text for summary
-                            if event["type"] in ("text_delta", "thinking_delta", "token_delta"):
-                                if event["content"]:
-                                    flow.metadata["cursor_stream_text"].append(event["content"])
+                        # (text is also collected as raw bytes for the summary)
+                        parse_agent_message_detailed(
+                            frame_data, include_raw=dump_raw, text_buf=text_buf,
+                            results=stream_events
+                        )
                 except Exception:
                     pass
                 
+                # Carry any incomplete frame forward to the next chunk
+                pending = len(buf) - offset
+                if not pending or not reassemble:
+                    if tail:
+                        tail = bytearray()
+                elif pending >= 5 and _GRPC_HEADER.unpack_from(buf, offset)[1] > MAX_REASSEMBLED_FRAME:
+                    # Implausible frame length: give up on reassembly for
+                    # this flow rather than buffer the rest of the stream
+                    reassemble = False
+                    tail = bytearray()
+                elif offset == 0 and buf is tail:
+                    pass  # Still waiting for the rest of the same frame
+                else:
+                    tail = bytearray(memoryview(buf)[offset:])
+                
                 return data
             
             flow.response.stream = modify_stream
@@ -747,6 +1132,7 @@ class CursorAnalyzer:
         """Handle response."""
         if not self.is_cursor_api(flow):
             return
+        text_buf = self._stream_text.pop(flow.id, None)
         
         # Check if request was filtered
         if not flow.metadata.get("cursor_show", True):
@@ -760,110 +1146,110 @@ class CursorAnalyzer:
         if flow.metadata.get("cursor_streaming", False):
             total_bytes = flow.metadata.get("cursor_stream_bytes", 0)
             total_chunks = flow.metadata.get("cursor_stream_chunks", 0)
-            text_fragments = flow.metadata.get("cursor_stream_text", [])
             events = flow.metadata.get("cursor_stream_events", [])
             
-            self.log(f"\n{c.BLUE}── Stream Complete #{req_id} ──{c.RESET}")
-            self.log(f"  {c.CYAN}Chunks:{c.RESET} {total_chunks}")
-            self.log(f"  {c.CYAN}Total Size:{c.RESET} {total_bytes} bytes")
+            # Collect the summary and write it out in one go
+            out = io.StringIO()
             
-            # Count events by type
+            def log(message: str):
+                out.write(message)
+                out.write("\n")
+            
+            log(f"\n{c.BLUE}── Stream Complete #{req_id} ──{c.RESET}")
+            log(f"{_CHUNKS_PREFIX}{total_chunks}")
+            log(f"{_TOTAL_SIZE_PREFIX}{total_bytes} bytes")
+            
+            # Count events by type, picking out tool calls and thinking text
+            # in the same pass
             event_counts = {}
+            tool_events = []
+            thinking_parts = []
             for e in events:
                 t = e.get("type", "unknown")
                 event_counts[t] = event_counts.get(t, 0) + 1
+                if t == "thinking_delta":
+                    content = e.get("content")
+                    if content:
+                        thinking_parts.append(content)
+                elif t in _TOOL_EVENT_TYPES:
+                    tool_events.append(e)
             
             if event_counts:
-                self.log(f"  {c.CYAN}Events:{c.RESET}")
+                log(f"  {c.CYAN}Events:{c.RESET}")
                 for event_type, count in sorted(event_counts.items()):
-                    self.log(f"    - {event_type}: {count}")
+                    log(f"    - {event_type}: {count}")
             
             # Show tool calls if any
-            tool_events = [e for e in events if e.get("type") in ("tool_call_started", "tool_call_completed", "partial_tool_call")]
             if tool_events:
-                self.log(f"  {c.YELLOW}Tool Calls:{c.RESET}")
+                log(f"  {c.YELLOW}Tool Calls:{c.RESET}")
                 for e in tool_events:
                     content = e.get("content", {})
                     if isinstance(content, dict):
                         event_type = e.get("type", "unknown")
                         tool_name = content.get("tool_name", "unknown")
                         call_id = content.get("call_id", "")
-                        call_id_short = call_id[:12] + "..." if len(call_id) > 12 else call_id
+                        call_id_short = _preview(call_id, 12)
                         args = content.get("args", {})
                         args_delta = content.get("args_delta", "")
                         
                         if event_type == "partial_tool_call":
                             # Show incremental args
                             if args_delta:
-                                delta_preview = args_delta[:200]
-                                if len(args_delta) > 200:
-                                    delta_preview += "..."
-                                self.log(f"    [partial] {tool_name}: {delta_preview}")
+                                log(f"    [partial] {tool_name}: {_preview(args_delta, 200)}")
                             else:
-                                self.log(f"    [partial] {tool_name} ({call_id_short})")
+                                log(f"    [partial] {tool_name} ({call_id_short})")
                         else:
                             # Show full tool call with args
-                            self.log(f"    [{event_type.replace('tool_call_', '')}] {tool_name}")
+                            log(f"    [{event_type.replace('tool_call_', '')}] {tool_name}")
                             if call_id:
-                                self.log(f"      call_id: {call_id_short}")
+                                log(f"      call_id: {call_id_short}")
                             if args:
                                 for arg_name, arg_val in args.items():
                                     if isinstance(arg_val, str):
-                                        val_preview = arg_val[:100]
-                                        if len(arg_val) > 100:
-                                            val_preview += "..."
-                                        self.log(f"      {arg_name}: {val_preview}")
+                                        log(f"      {arg_name}: {_preview(arg_val, 100)}")
                                     else:
-                                        self.log(f"      {arg_name}: {arg_val}")
+                                        log(f"      {arg_name}: {arg_val}")
             
             # Show thinking content if any
-            thinking_events = [e for e in events if e.get("type") == "thinking_delta" and e.get("content")]
-            if thinking_events:
-                self.log(f"  {c.MAGENTA}Thinking:{c.RESET}")
-                thinking_text = ''.join(e.get("content", "") for e in thinking_events)
-                preview = thinking_text[:500]
-                if len(thinking_text) > 500:
-                    preview += "..."
-                self.log(f"    {preview}")
+            if thinking_parts:
+                log(f"  {c.MAGENTA}Thinking:{c.RESET}")
+                log(f"    {_join_preview(thinking_parts, 500)}")
             
             # Show AI text response
-            if text_fragments:
-                self.log(f"  {c.GREEN}AI Response:{c.RESET}")
-                combined = ''.join(text_fragments)
-                preview = combined[:800]
-                if len(combined) > 800:
-                    preview += "..."
-                self.log(f"    {preview}")
+            if text_buf:
+                log(_AI_RESPONSE_HEADER)
+                log(f"    {_preview(text_buf.decode('utf-8', 'replace'), 800)}")
             
             # Save tool call data for verification if enabled
-            if self.toolcall_dump_file and tool_events:
-                for e in tool_events:
-                    raw_hex = e.get("raw_hex")
-                    if raw_hex:
-                        dump_entry = {
-                            "timestamp": timestamp(),
-                            "request_id": str(req_id),
-                            "endpoint": endpoint,
-                            "event_type": e.get("type"),
-                            "raw_hex": raw_hex,
-                            "python_parsed": e.get("content", {})
-                        }
-                        self.toolcall_dump_data.append(dump_entry)
-                
-                # Write to file
+            if self._dump_fh is not None and tool_events:
                 try:
-                    with open(self.toolcall_dump_file, "w") as f:
-                        json.dump(self.toolcall_dump_data, f, indent=2, ensure_ascii=False)
-                    self.log(f"  {c.DIM}[Saved {len(tool_events)} tool calls to {self.toolcall_dump_file}]{c.RESET}")
+                    for e in tool_events:
+                        raw_hex = e.get("raw_hex")
+                        if raw_hex:
+                            dump_entry = {
+                                "timestamp": timestamp(),
+                                "request_id": str(req_id),
+                                "endpoint": endpoint,
+                                "event_type": e.get("type"),
+                                "raw_hex": raw_hex,
+                                "python_parsed": e.get("content", {})
+                            }
+                            self._dump_fh.write(dump_json_line(dump_entry))
+                            self._dump_count += 1
+                            if self.dump_max_entries and self._dump_count >= self.dump_max_entries:
+                                self._rotate_dump()
+                    self._dump_fh.flush()
+                    log(f"  {c.DIM}[Saved {len(tool_events)} tool calls to {self.toolcall_dump_file}]{c.RESET}")
                 except Exception as ex:
-                    self.log(f"  {c.RED}[Error saving tool calls: {ex}]{c.RESET}")
+                    log(f"  {c.RED}[Error saving tool calls: {ex}]{c.RESET}")
             
-            self.log(f"  {c.GREEN}[Stream Finished]{c.RESET}")
+            log(_STREAM_FINISHED)
+            self._flush_log_buf(out.getvalue())
             return
         
         # Non-streaming response
         self.log(f"\n{c.BLUE}── Response #{req_id} ──{c.RESET}")
-        self.log(f"  {c.CYAN}Status:{c.RESET} {flow.response.status_code}")
+        self.log(f"{_STATUS_PREFIX}{flow.response.status_code}")
         self.log(f"  {c.CYAN}Content-Type:{c.RESET} {content_type}")
         
         if not flow.response.content:
@@ -882,33 +1268,102 @@ class CursorAnalyzer:
                 endpoint=endpoint
             )
     
+    def error(self, flow: http.HTTPFlow):
+        """Release the text buffer of a stream that never completed."""
+        self._stream_text.pop(flow.id, None)
+    
+    def _stop_bun_worker(self):
+        """Terminate the analyzer worker, if running (caller holds _bun_lock)."""
+        proc = self._bun_proc
+        if proc is None:
+            return
+        self._bun_proc = None
+        try:
+            proc.stdin.close()
+            proc.terminate()
+            proc.wait(timeout=1)
+        except Exception:
+            proc.kill()
+    
+    def _analyze_via_bun(self, data: bytes, direction: str, endpoint: str = "",
+                         verbose: bool = False, raw: bool = False, timeout: float = 5) -> str:
+        """Analyze a protobuf message with cursor-sniffer.ts, return its output.
+        
+        Messages go to a persistent `--server` worker over a length-prefixed
+        stdio protocol; if the worker cannot be used, a one-shot `--analyze`
+        process is spawned instead. Returns "" when analysis failed and raises
+        subprocess.TimeoutExpired / FileNotFoundError like subprocess.run.
+        """
+        with self._bun_lock:
+            if self._bun_proc is None and not self._bun_worker_failed:
+                self._bun_proc = subprocess.Popen(
+                    self._bun_base_cmd + ["--server"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    cwd=self.project_root
+                )
+            proc = self._bun_proc
+            if proc is not None:
+                body = (
+                    bytes((_ANALYZER_DIRECTIONS.get(direction, 0), verbose | raw << 1))
+                    + endpoint.encode() + b"\0" + data
+                )
+                try:
+                    proc.stdin.write(_ANALYZER_LEN.pack(len(body)) + body)
+                    proc.stdin.flush()
+                    deadline = time.monotonic() + timeout
+                    fd = proc.stdout.fileno()
+                    size, = _ANALYZER_LEN.unpack(_read_exact(fd, 4, deadline))
+                    return _read_exact(fd, size, deadline).decode("utf-8", "replace")
+                except subprocess.TimeoutExpired:
+                    # Worker is mid-response; start a fresh one next time
+                    self._stop_bun_worker()
+                    raise
+                except (OSError, EOFError):
+                    # Worker exited (e.g. no --server support): stop using it
+                    self._stop_bun_worker()
+                    self._bun_worker_failed = True
+        
+        cmd = self._bun_base_cmd + [
+            "--analyze",
+            "--format", "binary",
+            "--direction", direction
+        ]
+        if endpoint:
+            cmd += ["--endpoint", endpoint]
+        if verbose:
+            cmd.append("--verbose")
+        if raw:
+            cmd.append("--raw")
+        result = subprocess.run(
+            cmd,
+            input=data,
+            capture_output=True,
+            timeout=timeout,
+            cwd=self.project_root,
+            # Our fds are non-inheritable (PEP 446); skip the fd table sweep
+            close_fds=False
+        )
+        if result.returncode != 0:
+            return ""
+        return result.stdout.decode().strip()
+    
     def analyze_message(self, data: bytes, direction: str, endpoint: str):
         """Analyze protobuf message using bun script."""
         if len(data) < 5:
             return
         
-        self.log(f"  {c.CYAN}Size:{c.RESET} {len(data)} bytes")
+        self.log(f"{_SIZE_PREFIX}{len(data)} bytes")
         
         # Try to use bun script for analysis
         try:
-            cmd = [
-                "bun", "run", 
-                os.path.join(self.project_root, "scripts/cursor-sniffer.ts"),
-                "--analyze",
-                "--direction", direction,
-                "--endpoint", endpoint,
-                "--verbose" if self.verbose else "--raw"
-            ]
-            result = subprocess.run(
-                cmd,
-                input=data.hex().encode(),
-                capture_output=True,
-                timeout=5,
-                cwd=self.project_root
+            output = self._analyze_via_bun(
+                data, direction, endpoint,
+                verbose=self.verbose, raw=not self.verbose, timeout=5
             )
             
-            if result.returncode == 0 and result.stdout:
-                output = result.stdout.decode().strip()
+            if output:
                 for line in output.split("\n"):
                     self.log(f"    {line}")
             else:
@@ -925,117 +1380,116 @@ class CursorAnalyzer:
             self.log(f"  {c.RED}[Analysis error: {e}]{c.RESET}")
             self.show_hex_preview(data)
     
+    def _analyze_frames_via_bun(self, payloads: list, endpoint: str) -> list:
+        """Analyze gRPC frame payloads, return their outputs in order ("" on failure).
+        
+        The persistent worker handles one message at a time, so frames are
+        sent to it in sequence; one-shot processes (worker unavailable) are
+        run in parallel on the thread pool.
+        """
+        def analyze(frame_data) -> str:
+            try:
+                return self._analyze_via_bun(frame_data, "response", endpoint, timeout=3)
+            except Exception:
+                return ""
+        
+        if self._bun_worker_failed and len(payloads) > 1:
+            return list(self._pool.map(analyze, payloads))
+        return [analyze(frame_data) for frame_data in payloads]
+    
     def analyze_grpc_stream(self, data: bytes, endpoint: str):
         """Analyze gRPC-Web streaming response (used by RunSSE)."""
-        self.log(f"  {c.CYAN}Size:{c.RESET} {len(data)} bytes")
+        self.log(f"{_SIZE_PREFIX}{len(data)} bytes")
         self.log(f"  {c.MAGENTA}[gRPC-Web Stream]{c.RESET}")
         
-        # Parse gRPC-Web frames
-        offset = 0
-        frame_count = 0
-        text_fragments = []
+        # Parse gRPC-Web frames (zero-copy views into data)
+        frames, _ = split_grpc_frames(data)
+        frame_count = len(frames)
+        events = []  # Events of all frames
         
-        while offset + 5 <= len(data):
-            flags = data[offset]
-            length = int.from_bytes(data[offset+1:offset+5], 'big')
-            
-            if offset + 5 + length > len(data):
-                break
-            
-            frame_data = data[offset+5:offset+5+length]
-            offset += 5 + length
-            frame_count += 1
-            
+        # Full per-frame analysis is only shown in verbose mode
+        analyses = None
+        if self.verbose:
+            analyses = iter(self._analyze_frames_via_bun(
+                [frame_data for flags, frame_data in frames if not flags & 0x80], endpoint
+            ))
+        
+        for flags, frame_data in frames:
             # Check for trailer frame (flags & 0x80)
             if flags & 0x80:
                 try:
-                    trailer = frame_data.decode('utf-8')
+                    trailer = bytes(frame_data).decode('utf-8')
                     self.log(f"  {c.DIM}[Trailer] {trailer[:100]}...{c.RESET}")
                 except:
                     pass
                 continue
             
-            # Parse AgentServerMessage
-            try:
-                result = subprocess.run(
-                    [
-                        "bun", "run",
-                        os.path.join(self.project_root, "scripts/cursor-sniffer.ts"),
-                        "--analyze",
-                        "--direction", "response",
-                        "--endpoint", endpoint
-                    ],
-                    input=frame_data.hex().encode(),
-                    capture_output=True,
-                    timeout=3,
-                    cwd=self.project_root
-                )
-                
-                if result.returncode == 0 and result.stdout:
-                    output = result.stdout.decode().strip()
-                    # Extract text content for summary
+            # Parse AgentServerMessage in-process for the text summary
+            parse_agent_message_detailed(frame_data, results=events)
+            
+            if analyses is not None:
+                output = next(analyses)
+                if output:
                     for line in output.split("\n"):
-                        if "text_delta" in line.lower() or "Text:" in line:
-                            text_fragments.append(line.strip())
-                        elif self.verbose:
-                            self.log(f"      {line}")
-            except:
-                pass
+                        self.log(f"      {line}")
         
-        self.log(f"  {c.CYAN}Frames:{c.RESET} {frame_count}")
+        self.log(f"{_FRAMES_PREFIX}{frame_count}")
         
-        # Show text summary
-        if text_fragments:
-            self.log(f"  {c.GREEN}AI Response:{c.RESET}")
-            # Combine and show first part of response
-            combined = " ".join(text_fragments)[:500]
-            self.log(f"    {combined}{'...' if len(combined) >= 500 else ''}")
+        # Show text summary (first part of the response only)
+        combined = _join_preview(
+            (e["content"] for e in events if e["type"] in _TEXT_EVENT_TYPES), 500
+        )
+        if combined:
+            self.log(_AI_RESPONSE_HEADER)
+            self.log(f"    {combined}")
     
     def analyze_sse(self, data: bytes, endpoint: str):
         """Analyze SSE response."""
         try:
-            content = data.decode("utf-8")
-            lines = content.split("\n")
             message_count = 0
+            events = []  # Reused for every message
             
-            for line in lines:
-                if line.startswith("data: "):
-                    payload = line[6:].strip()
-                    if payload == "[DONE]":
-                        self.log(f"  {c.DIM}[DONE]{c.RESET}")
-                        continue
-                    
-                    message_count += 1
-                    try:
-                        decoded = base64.b64decode(payload)
-                        self.analyze_sse_message(decoded, message_count)
-                    except Exception as e:
-                        self.log(f"  {c.RED}[Decode error: {e}]{c.RESET}")
+            for match in _SSE_DATA_RE.finditer(data):
+                payload = match.group(1).strip()
+                if payload == b"[DONE]":
+                    self.log(f"  {c.DIM}[DONE]{c.RESET}")
+                    continue
+                
+                message_count += 1
+                try:
+                    decoded = a2b_base64(payload)
+                    self.analyze_sse_message(decoded, message_count, events)
+                except Exception as e:
+                    self.log(f"  {c.RED}[Decode error: {e}]{c.RESET}")
             
             self.log(f"  {c.CYAN}Total messages:{c.RESET} {message_count}")
             
         except Exception as e:
             self.log(f"  {c.RED}[SSE parse error: {e}]{c.RESET}")
     
-    def analyze_sse_message(self, data: bytes, msg_num: int):
-        """Analyze a single SSE message."""
+    def analyze_sse_message(self, data: bytes, msg_num: int, events: Optional[list] = None):
+        """Analyze a single SSE message.
+        
+        events is an optional scratch list reused across the messages of
+        one response; it is cleared before use.
+        """
         if self.verbose:
+            # AgentServerMessages are summarized in-process; anything else
+            # goes to the full analyzer
+            if events is None:
+                events = []
+            else:
+                events.clear()
+            parse_agent_message_detailed(strip_grpc_envelope(data), results=events)
+            if events:
+                self.log(f"  {c.YELLOW}Message {msg_num}:{c.RESET}")
+                for event in events:
+                    self.log(f"    {c.CYAN}{event['type']}:{c.RESET} {_event_summary(event)}")
+                return
             try:
-                result = subprocess.run(
-                    [
-                        "bun", "run",
-                        os.path.join(self.project_root, "scripts/cursor-sniffer.ts"),
-                        "--analyze",
-                        "--direction", "response"
-                    ],
-                    input=data.hex().encode(),
-                    capture_output=True,
-                    timeout=5,
-                    cwd=self.project_root
-                )
+                output = self._analyze_via_bun(data, "response", timeout=5)
                 
-                if result.returncode == 0 and result.stdout:
-                    output = result.stdout.decode().strip()
+                if output:
                     self.log(f"  {c.YELLOW}Message {msg_num}:{c.RESET}")
                     for line in output.split("\n"):
                         if line.strip():
@@ -567,6 +567,7 @@ export async function analyzeFromStdin(options: {
   verbose?: boolean;
   showRaw?: boolean;
   endpoint?: string;
+  format?: DataFormat;
 }): Promise<void> {
   const chunks: Buffer[] = [];
 
@@ -574,9 +575,24 @@ export async function analyzeFromStdin(options: {
     chunks.push(Buffer.from(chunk));
   }
 
-  const input = Buffer.concat(chunks);
+  analyzeInput(Buffer.concat(chunks), options);
+}
+
+// Analyze one input buffer, writing each output line through `log`
+export function analyzeInput(
+  input: Buffer,
+  options: {
+    isBase64?: boolean;
+    direction?: "request" | "response";
+    verbose?: boolean;
+    showRaw?: boolean;
+    endpoint?: string;
+    format?: DataFormat;
+  },
+  log: (line: string) => void = console.log,
+): void {
   const inputStr = input.toString().trim();
-  const format = detectFormat(inputStr);
+  const format = options.format ?? detectFormat(inputStr);
   
   let data: Uint8Array;
   
@@ -586,15 +602,15 @@ export async function analyzeFromStdin(options: {
     data = Buffer.from(inputStr.replace(/\s/g, ""), "hex");
   } else if (format === "sse") {
     const messages = parseSSEData(inputStr);
-    console.log(`${c.cyan}Analyzing ${messages.length} SSE messages...${c.reset}\n`);
+    log(`${c.cyan}Analyzing ${messages.length} SSE messages...${c.reset}\n`);
     for (let i = 0; i < messages.length; i++) {
-      console.log(`${c.yellow}── Message ${i + 1} ──${c.reset}`);
+      log(`${c.yellow}── Message ${i + 1} ──${c.reset}`);
       const payload = removeEnvelope(messages[i]!);
       const serverMsgs = parseAgentServerMessage(payload);
       for (const msg of serverMsgs) {
-        console.log(`  ${c.cyan}${msg.type}:${c.reset} ${msg.summary}`);
+        log(`  ${c.cyan}${msg.type}:${c.reset} ${msg.summary}`);
         if (options.verbose && Object.keys(msg.details).length > 0) {
-          console.log(`    ${c.dim}${JSON.stringify(msg.details)}${c.reset}`);
+          log(`    ${c.dim}${JSON.stringify(msg.details)}${c.reset}`);
         }
       }
     }
@@ -603,15 +619,15 @@ export async function analyzeFromStdin(options: {
     data = input;
   }
 
-  console.log(`${c.cyan}════════════════════════════════════════════════════════════${c.reset}`);
-  console.log(`${c.cyan} Protobuf Analysis${c.reset}`);
-  console.log(`${c.cyan}════════════════════════════════════════════════════════════${c.reset}`);
+  log(`${c.cyan}════════════════════════════════════════════════════════════${c.reset}`);
+  log(`${c.cyan} Protobuf Analysis${c.reset}`);
+  log(`${c.cyan}════════════════════════════════════════════════════════════${c.reset}`);
   
   // Check for gRPC-Web envelope
   const hasEnvelope = hasGrpcWebEnvelope(data);
   const payload = removeEnvelope(data);
   
-  console.log(`${c.dim}Input: ${data.length} bytes${hasEnvelope ? `, Payload: ${payload.length} bytes (envelope removed)` : " (no envelope)"}${c.reset}\n`);
+  log(`${c.dim}Input: ${data.length} bytes${hasEnvelope ? `, Payload: ${payload.length} bytes (envelope removed)` : " (no envelope)"}${c.reset}\n`);
   
   let parsed = false;
   
@@ -621,13 +637,13 @@ export async function analyzeFromStdin(options: {
       const response = parseGetUsableModelsResponse(data);
       if (response.models.length > 0) {
         parsed = true;
-        console.log(`${c.green}GetUsableModelsResponse:${c.reset} ${response.models.length} models\n`);
+        log(`${c.green}GetUsableModelsResponse:${c.reset} ${response.models.length} models\n`);
         for (let i = 0; i < response.models.length; i++) {
           const model = response.models[i]!;
-          console.log(`${c.yellow}[${i + 1}]${c.reset} ${c.green}${model.modelId || "unknown"}${c.reset}`);
-          if (model.displayName) console.log(`    ${c.dim}Display: ${model.displayName}${c.reset}`);
+          log(`${c.yellow}[${i + 1}]${c.reset} ${c.green}${model.modelId || "unknown"}${c.reset}`);
+          if (model.displayName) log(`    ${c.dim}Display: ${model.displayName}${c.reset}`);
           if (model.aliases && model.aliases.length > 0) {
-            console.log(`    ${c.dim}Aliases: ${model.aliases.join(", ")}${c.reset}`);
+            log(`    ${c.dim}Aliases: ${model.aliases.join(", ")}${c.reset}`);
           }
         }
       }
@@ -635,8 +651,8 @@ export async function analyzeFromStdin(options: {
       const response = parseGetDefaultModelForCliResponse(data);
       if (response.model) {
         parsed = true;
-        console.log(`${c.green}GetDefaultModelForCliResponse:${c.reset}`);
-        console.log(formatUsableModel(response.model, "  "));
+        log(`${c.green}GetDefaultModelForCliResponse:${c.reset}`);
+        log(formatUsableModel(response.model, "  "));
       }
     }
   }
@@ -646,11 +662,11 @@ export async function analyzeFromStdin(options: {
     const messages = parseAgentServerMessage(payload);
     if (messages.length > 0) {
       parsed = true;
-      console.log(`${c.green}Parsed as AgentServerMessage:${c.reset}`);
+      log(`${c.green}Parsed as AgentServerMessage:${c.reset}`);
       for (const msg of messages) {
-        console.log(`  ${c.cyan}${msg.type}:${c.reset} ${msg.summary}`);
+        log(`  ${c.cyan}${msg.type}:${c.reset} ${msg.summary}`);
         if (options.verbose && Object.keys(msg.details).length > 0) {
-          console.log(`    ${c.dim}${JSON.stringify(msg.details)}${c.reset}`);
+          log(`    ${c.dim}${JSON.stringify(msg.details)}${c.reset}`);
         }
       }
     }
@@ -658,22 +674,81 @@ export async function analyzeFromStdin(options: {
     const msg = parseAgentClientMessage(payload);
     if (msg.summary) {
       parsed = true;
-      console.log(`${c.green}Parsed as AgentClientMessage:${c.reset}`);
-      console.log(`  ${c.cyan}Type:${c.reset} ${msg.summary}`);
+      log(`${c.green}Parsed as AgentClientMessage:${c.reset}`);
+      log(`  ${c.cyan}Type:${c.reset} ${msg.summary}`);
       if (options.verbose && Object.keys(msg.details).length > 0) {
-        console.log(`  ${c.cyan}Details:${c.reset} ${JSON.stringify(msg.details, null, 2)}`);
+        log(`  ${c.cyan}Details:${c.reset} ${JSON.stringify(msg.details, null, 2)}`);
       }
     }
   }
   
   // Fallback to generic protobuf field analysis
   if (!parsed) {
-    console.log(`${c.yellow}Raw protobuf fields:${c.reset}`);
-    console.log(analyzeProtoFields(payload, 0, options.showRaw));
+    log(`${c.yellow}Raw protobuf fields:${c.reset}`);
+    log(analyzeProtoFields(payload, 0, options.showRaw));
   }
   
   if (options.showRaw) {
-    console.log(`\n${c.dim}Raw hex dump:${c.reset}`);
-    console.log(hexDump(payload));
+    log(`\n${c.dim}Raw hex dump:${c.reset}`);
+    log(hexDump(payload));
   }
 }
+
+/**
+ * Persistent analysis worker (`--server`), used by the mitmproxy addon so it
+ * does not spawn bun once per message.
+ *
+ * Frames on stdin:  u32 length | u8 direction | u8 flags | endpoint | 0x00 | payload
+ * Frames on stdout: u32 length | UTF-8 analysis output (empty on failure)
+ *
+ * Lengths are big-endian. direction: 0 = unknown, 1 = request, 2 = response.
+ * flags: bit 0 = verbose, bit 1 = raw.
+ */
+export async function runAnalyzeServer(): Promise<void> {
+  let pending = Buffer.alloc(0);
+
+  for await (const chunk of process.stdin) {
+    pending = pending.length > 0 ? Buffer.concat([pending, Buffer.from(chunk)]) : Buffer.from(chunk);
+
+    while (pending.length >= 4) {
+      const length = pending.readUInt32BE(0);
+      if (pending.length < 4 + length) break;
+
+      const frame = pending.subarray(4, 4 + length);
+      pending = pending.subarray(4 + length);
+
+      const output = Buffer.from(analyzeServerFrame(frame), "utf-8");
+      const header = Buffer.alloc(4);
+      header.writeUInt32BE(output.length, 0);
+      process.stdout.write(Buffer.concat([header, output]));
+    }
+  }
+}
+
+function analyzeServerFrame(frame: Buffer): string {
+  const nul = frame.indexOf(0, 2);
+  if (frame.length < 2 || nul < 0) return "";
+
+  const directionByte = frame[0];
+  const flags = frame[1] ?? 0;
+  const endpoint = frame.subarray(2, nul).toString("utf-8");
+  const lines: string[] = [];
+
+  try {
+    analyzeInput(
+      frame.subarray(nul + 1),
+      {
+        direction: directionByte === 1 ? "request" : directionByte === 2 ? "response" : undefined,
+        verbose: (flags & 1) !== 0,
+        showRaw: (flags & 2) !== 0,
+        endpoint: endpoint || undefined,
+        format: "binary",
+      },
+      (line) => lines.push(line),
+    );
+  } catch {
+    return "";
+  }
+
+  return lines.join("\n").trim();
+}
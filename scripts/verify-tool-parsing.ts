@@ -11,7 +11,7 @@
  *   bun scripts/verify-tool-parsing.ts --schema              # Print tool schemas
  *   bun scripts/verify-tool-parsing.ts --hex <hex_data>      # Parse hex string
  *   bun scripts/verify-tool-parsing.ts --file <path>         # Parse binary file
- *   bun scripts/verify-tool-parsing.ts --verify <dump.json>  # Verify against mitmproxy dump
+ *   bun scripts/verify-tool-parsing.ts --verify <dump.jsonl> # Verify against mitmproxy dump
  */
 
 import {
@@ -447,8 +447,14 @@ function verifyDump(dumpFile: string) {
 
   let entries: DumpEntry[];
   try {
+    // JSON Lines: one entry per line (older dumps were a single JSON array)
     const content = fs.readFileSync(dumpFile, "utf-8");
-    entries = JSON.parse(content);
+    entries = content.trimStart().startsWith("[")
+      ? JSON.parse(content)
+      : content
+          .split("\n")
+          .filter((line) => line.trim())
+          .map((line) => JSON.parse(line) as DumpEntry);
   } catch (err) {
     failure(`Failed to parse JSON: ${err}`);
     return;
@@ -567,7 +573,7 @@ Usage:
   bun scripts/verify-tool-parsing.ts --schema              Print tool schemas
   bun scripts/verify-tool-parsing.ts --hex <hex>           Parse hex string
   bun scripts/verify-tool-parsing.ts --file <path>         Parse binary file
-  bun scripts/verify-tool-parsing.ts --verify <dump.json>  Verify against mitmproxy dump
+  bun scripts/verify-tool-parsing.ts --verify <dump.jsonl> Verify against mitmproxy dump
 
 Examples:
   # Parse captured gRPC payload
@@ -575,9 +581,9 @@ Examples:
 
   # Verify real traffic captured by mitmproxy
   # First, run mitmproxy with dump enabled:
-  #   mitmdump -s scripts/mitmproxy-addon.py --set cursor_dump_toolcalls=toolcalls.json
+  #   mitmdump -s scripts/mitmproxy-addon.py --set cursor_dump_toolcalls=toolcalls.jsonl
   # Then verify:
-  bun scripts/verify-tool-parsing.ts --verify toolcalls.json
+  bun scripts/verify-tool-parsing.ts --verify toolcalls.jsonl
 `);
     return;
   }